@@ -7,26 +7,39 @@ Phase 2.2 Manual Rate Edition: FX予測アプリ - 手動レート設定対応
 """
 
 import http.server
-import socketserver
 import json
+import gzip
+import hashlib
 import datetime
 import random
 import math
+import logging
+import logging.handlers
 import os
+import queue
+import signal
 import time
-from typing import Dict, List, Tuple, Any, Optional
+import urllib.parse
+import functools
+import threading
+import concurrent.futures
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Any, Optional, Mapping, FrozenSet, Callable, NamedTuple
+
+# ログ出力（レベルは環境変数LOG_LEVELで指定, 試行ごとの詳細はDEBUG）
+logger = logging.getLogger("fx_predictor")
 
 # Phase 2.1: requestsライブラリ
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     REQUESTS_AVAILABLE = True
     print("✅ requests ライブラリ利用可能")
 except ImportError:
     REQUESTS_AVAILABLE = False
     print("⚠️ requests ライブラリなし - 標準ライブラリモードで動作")
-    import urllib.request
-    import urllib.parse
-    import urllib.error
+    import http.client
 
 # Phase 2.2: python-dateutilライブラリ
 try:
@@ -39,15 +52,172 @@ except ImportError:
     DATEUTIL_AVAILABLE = False
     print("⚠️ python-dateutil ライブラリなし - 基本日付処理で動作")
 
+# JSON高速化: orjsonライブラリ（任意）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    print("✅ orjson ライブラリ利用可能")
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("⚠️ orjson ライブラリなし - 標準jsonモジュールで動作")
+
+# 共有キャッシュ: redisライブラリ（任意, REDIS_URL設定時のみ使用）
+try:
+    import redis
+    REDIS_AVAILABLE = True
+    print("✅ redis ライブラリ利用可能")
+except ImportError:
+    REDIS_AVAILABLE = False
+    print("⚠️ redis ライブラリなし - プロセス内キャッシュのみで動作")
+
+def _json_loads(data: bytes) -> Any:
+    """JSONデコード（orjson優先）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj: Any) -> bytes:
+    """JSONエンコード（UTF-8バイト列, orjson優先）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# 定数テーブル（インスタンス間で共有, 読み取り専用）
+CURRENCY_PAIRS: Tuple[str, ...] = ("USD/JPY", "EUR/JPY", "EUR/USD")
+
+BASE_RATES: Mapping[str, float] = MappingProxyType({
+    "USD/JPY": 147.49,
+    "EUR/JPY": 173.16,
+    "EUR/USD": 1.174
+})
+
+# 通貨ペアごとの主要市場（JPY→東京, EUR→ロンドン, USD→ニューヨークの優先順で決定済み）
+PRIMARY_MARKETS: Mapping[str, str] = MappingProxyType({
+    "USD/JPY": "Tokyo",
+    "EUR/JPY": "Tokyo",
+    "EUR/USD": "London"
+})
+
+# レートの妥当範囲と小数桁数 (min, max, decimal)（API検証・手動入力検証で共通）
+VALID_RATE_RANGES: Mapping[str, Tuple[float, float, int]] = MappingProxyType({
+    "USD/JPY": (80.0, 250.0, 3),
+    "EUR/JPY": (100.0, 300.0, 4),
+    "EUR/USD": (0.5, 2.0, 4)
+})
+
+# 為替レートAPI設定（全インスタンス共通, 読み取り専用）
+class APIConfig(NamedTuple):
+    name: str
+    url: str
+    timeout: float
+    retries: int
+    headers: Mapping[str, str]
+
+API_CONFIGS: Tuple[APIConfig, ...] = (
+    APIConfig(
+        name="exchangerate-api",
+        url="https://api.exchangerate-api.com/v4/latest/USD",
+        timeout=15,
+        retries=3,
+        headers=MappingProxyType({
+            'User-Agent': 'Mozilla/5.0 (compatible; FX-Predictor/2.2)',
+            'Accept': 'application/json',
+            'Cache-Control': 'no-cache'
+        })
+    ),
+    APIConfig(
+        name="exchangerate-host",
+        url="https://api.exchangerate.host/latest?base=USD",
+        timeout=12,
+        retries=2,
+        headers=MappingProxyType({
+            'User-Agent': 'Mozilla/5.0 (compatible; FX-Predictor/2.2)',
+            'Accept': 'application/json'
+        })
+    ),
+    APIConfig(
+        name="fxratesapi",
+        url="https://api.fxratesapi.com/latest?base=USD",
+        timeout=10,
+        retries=2,
+        headers=MappingProxyType({
+            'User-Agent': 'curl/7.64.1',
+            'Accept': 'application/json'
+        })
+    ),
+    APIConfig(
+        name="vatcomply",
+        url="https://api.vatcomply.com/rates?base=USD",
+        timeout=8,
+        retries=1,
+        headers=MappingProxyType({
+            'User-Agent': 'FX-Predictor-Bot/2.2',
+            'Accept': 'application/json'
+        })
+    ),
+)
+
+# 再試行する一時的なHTTPステータス（それ以外の非200は同じ結果になるため再試行しない）
+RETRYABLE_STATUS: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+# USD基準のrates辞書から各通貨ペアのレートを算出する関数
+_PAIR_EXTRACT: Mapping[str, Callable[[Mapping[str, float]], Optional[float]]] = MappingProxyType({
+    "USD/JPY": lambda rates: rates.get("JPY"),
+    "EUR/JPY": lambda rates: rates.get("JPY", 0) / rates["EUR"] if rates.get("EUR", 0) > 0 else None,
+    "EUR/USD": lambda rates: 1 / rates["EUR"] if rates.get("EUR", 0) > 0 else None
+})
+
+# 祝日の(月, 日)集合（O(1)判定）
+MAJOR_HOLIDAYS: Mapping[str, FrozenSet[Tuple[int, int]]] = MappingProxyType({
+    "JP": frozenset([(1, 1), (2, 11), (4, 29), (5, 3), (5, 4), (5, 5), (12, 31)]),
+    "US": frozenset([(1, 1), (7, 4), (12, 25)]),
+    "UK": frozenset([(1, 1), (12, 25), (12, 26)])
+})
+
+RSI_PERIOD = 14
+# 過去データシミュレーションの日数（現在レートから遡る30日分のランダムウォーク）
+SIMULATED_HISTORY_DAYS = 30
+# 指標計算で参照する最大の期間（MA10・RSI14）に合わせた過去データ本数
+HISTORY_LENGTH = max(RSI_PERIOD + 1, 10)
+_NO_HOLIDAYS = frozenset()
+
+def _compute_technical_indicators(rates: List[float]) -> Tuple[float, float, float]:
+    """MA5・MA10・RSIを1パスで計算"""
+    # スライスを作らず末尾から必要本数だけ走査（長い系列でもO(k)）
+    ma5 = math.fsum(islice(reversed(rates), 5)) / 5
+    ma10 = math.fsum(islice(reversed(rates), 10)) / min(10, len(rates))
+    
+    # RSIは直近RSI_PERIOD本の変化のみ使用するため、その区間だけ走査
+    window = rates[-(RSI_PERIOD + 1):]
+    periods = len(window) - 1
+    gain_total = 0.0
+    loss_total = 0.0
+    for prev_rate, rate in zip(window, window[1:]):
+        change = rate - prev_rate
+        if change > 0:
+            gain_total += change
+        else:
+            loss_total -= change
+    
+    avg_gain = gain_total / periods if periods else 0.01
+    avg_loss = loss_total / periods if periods else 0.01
+    rs = avg_gain / avg_loss if avg_loss != 0 else 1
+    rsi = 100 - (100 / (1 + rs))
+    
+    return round(ma5, 4), round(ma10, 4), round(rsi, 2)
+
+@functools.lru_cache(maxsize=32)
+def _gettz_cached(name: str):
+    """tz.gettzの結果をプロセス内でキャッシュ"""
+    return tz.gettz(name)
+
 class BusinessDayCalculator:
     """営業日計算クラス（Phase 2.2機能）"""
     
+    __slots__ = ("major_holidays",)
+    
     def __init__(self):
-        self.major_holidays = {
-            "JP": [(1, 1), (2, 11), (4, 29), (5, 3), (5, 4), (5, 5), (12, 31)],
-            "US": [(1, 1), (7, 4), (12, 25)],
-            "UK": [(1, 1), (12, 25), (12, 26)]
-        }
+        self.major_holidays = MAJOR_HOLIDAYS
     
     def is_business_day(self, date: datetime.date, country: str = "JP") -> bool:
         if not DATEUTIL_AVAILABLE:
@@ -56,9 +226,7 @@ class BusinessDayCalculator:
         if date.weekday() >= 5:
             return False
         
-        holidays = self.major_holidays.get(country, [])
-        month_day = (date.month, date.day)
-        return month_day not in holidays
+        return (date.month, date.day) not in self.major_holidays.get(country, _NO_HOLIDAYS)
     
     def get_next_business_day(self, date: datetime.date, country: str = "JP") -> datetime.date:
         next_date = date + datetime.timedelta(days=1)
@@ -67,21 +235,69 @@ class BusinessDayCalculator:
         return next_date
     
     def add_business_days(self, start_date: datetime.date, business_days: int, country: str = "JP") -> datetime.date:
-        if not DATEUTIL_AVAILABLE or business_days <= 0:
-            return start_date + datetime.timedelta(days=business_days)
+        return self.add_business_days_multi(start_date, [business_days], country)[0]
+    
+    def add_business_days_multi(self, start_date: datetime.date, offsets: List[int], country: str = "JP") -> List[datetime.date]:
+        """複数の営業日オフセットを1回の暦走査でまとめて計算（同一条件の結果はキャッシュ）"""
+        if not DATEUTIL_AVAILABLE:
+            return [start_date + datetime.timedelta(days=offset) for offset in offsets]
         
+        if self.major_holidays is MAJOR_HOLIDAYS:
+            return list(_business_dates_cached(start_date, tuple(offsets), country))
+        return self._walk_business_days(start_date, offsets, country)
+    
+    def _walk_business_days(self, start_date: datetime.date, offsets, country: str) -> List[datetime.date]:
+        """昇順のオフセットごとに前回位置から営業日を進める"""
+        results = {}
         current_date = start_date
         added_days = 0
+        for offset in sorted(set(offsets)):
+            if offset <= 0:
+                results[offset] = start_date + datetime.timedelta(days=offset)
+                continue
+            current_date = self._advance_business_days(current_date, offset - added_days, country)
+            added_days = offset
+            results[offset] = current_date
         
-        while added_days < business_days:
-            current_date = self.get_next_business_day(current_date, country)
-            added_days += 1
-        
-        return current_date
+        return [results[offset] for offset in offsets]
+    
+    def _advance_business_days(self, date: datetime.date, business_days: int, country: str) -> datetime.date:
+        """営業日をbusiness_days日進める（完全な週は暦計算で一括スキップ）"""
+        if business_days <= 0:
+            return date
+        # 最後の1日は必ず逐次で進め、結果が営業日になるようにする
+        weeks, remaining = divmod(business_days - 1, 5)
+        remaining += 1
+        if weeks:
+            # 連続する7日には平日が必ず5日含まれる -> 飛ばした区間の平日祝日分だけ追加で進める
+            end_date = date + datetime.timedelta(weeks=weeks)
+            remaining += self._count_weekday_holidays(date, end_date, country)
+            date = end_date
+        
+        for _ in range(remaining):
+            date = self.get_next_business_day(date, country)
+        return date
+    
+    def _count_weekday_holidays(self, start_date: datetime.date, end_date: datetime.date, country: str) -> int:
+        """(start_date, end_date] に含まれる平日の祝日数"""
+        count = 0
+        for year in range(start_date.year, end_date.year + 1):
+            for month, day in self.major_holidays.get(country, _NO_HOLIDAYS):
+                holiday = datetime.date(year, month, day)
+                if start_date < holiday <= end_date and holiday.weekday() < 5:
+                    count += 1
+        return count
+
+@functools.lru_cache(maxsize=512)
+def _business_dates_cached(start_date: datetime.date, offsets: Tuple[int, ...], country: str) -> Tuple[datetime.date, ...]:
+    """営業日計算結果のキャッシュ（祝日表MAJOR_HOLIDAYSは不変のため入力だけで結果が決まる）"""
+    return tuple(BusinessDayCalculator()._walk_business_days(start_date, offsets, country))
 
 class TimezoneManager:
     """タイムゾーン管理クラス（Phase 2.2機能）"""
     
+    __slots__ = ("market_timezones", "market_hours", "business_calc", "_tz_objects", "_utc")
+    
     def __init__(self):
         self.market_timezones = {
             "Tokyo": "Asia/Tokyo", "London": "Europe/London", 
@@ -92,14 +308,25 @@ class TimezoneManager:
             "London": {"open": 8, "close": 16.5},
             "New_York": {"open": 9.5, "close": 16}
         }
+        self.business_calc = BusinessDayCalculator()
+        # 市場タイムゾーンは初期化時に解決しておく
+        self._tz_objects = {}
+        self._utc = datetime.timezone.utc
+        if DATEUTIL_AVAILABLE:
+            for market, zone_name in self.market_timezones.items():
+                try:
+                    self._tz_objects[market] = _gettz_cached(zone_name)
+                except Exception:
+                    pass
     
     def get_timezone(self, timezone_name: str):
         if not DATEUTIL_AVAILABLE:
             return None
+        tz_object = self._tz_objects.get(timezone_name)
+        if tz_object is not None:
+            return tz_object
         try:
-            if timezone_name in self.market_timezones:
-                return tz.gettz(self.market_timezones[timezone_name])
-            return tz.gettz(timezone_name)
+            return _gettz_cached(self.market_timezones.get(timezone_name, timezone_name))
         except Exception:
             return None
     
@@ -111,7 +338,9 @@ class TimezoneManager:
             if target_tz is None:
                 return dt
             if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=tz.UTC)
+                dt = dt.replace(tzinfo=self._utc)
+            elif dt.tzinfo is target_tz:
+                return dt
             return dt.astimezone(target_tz)
         except Exception:
             return dt
@@ -121,14 +350,13 @@ class TimezoneManager:
             return True
         
         if dt is None:
-            dt = datetime.datetime.now()
+            dt = datetime.datetime.now(self._utc)
         
         market_time = self.convert_to_timezone(dt, market)
         if market_time is None:
             return True
         
-        business_calc = BusinessDayCalculator()
-        if not business_calc.is_business_day(market_time.date()):
+        if not self.business_calc.is_business_day(market_time.date()):
             return False
         
         hours = self.market_hours[market]
@@ -138,52 +366,47 @@ class TimezoneManager:
 class ManualRateManager:
     """手動レート管理クラス（新機能）"""
     
+    __slots__ = ("rate_ranges", "default_rates")
+    
     def __init__(self):
-        self.rate_ranges = {
-            "USD/JPY": {"min": 80.0, "max": 250.0, "decimal": 3},
-            "EUR/JPY": {"min": 100.0, "max": 300.0, "decimal": 4},
-            "EUR/USD": {"min": 0.5, "max": 2.0, "decimal": 4}
-        }
+        self.rate_ranges = VALID_RATE_RANGES
         
-        self.default_rates = {
-            "USD/JPY": 147.49,
-            "EUR/JPY": 173.16,
-            "EUR/USD": 1.174
-        }
+        self.default_rates = BASE_RATES
     
     def validate_manual_rate(self, pair: str, rate: float) -> Dict[str, Any]:
         """手動入力レートの検証"""
         try:
             rate = float(rate)
             
-            if pair not in self.rate_ranges:
+            range_info = self.rate_ranges.get(pair)
+            if range_info is None:
                 return {
                     "valid": False,
                     "error": f"未対応の通貨ペア: {pair}"
                 }
             
-            range_info = self.rate_ranges[pair]
-            min_rate = range_info["min"]
-            max_rate = range_info["max"]
+            min_rate, max_rate, decimal = range_info
             
-            if rate < min_rate or rate > max_rate:
+            # NaNは比較が常にFalseになるため範囲外として弾かれる
+            if not (min_rate <= rate <= max_rate):
                 return {
                     "valid": False,
                     "error": f"{pair}の有効範囲: {min_rate} - {max_rate}"
                 }
             
-            # 小数点以下の桁数チェック
-            decimal_places = len(str(rate).split('.')[-1]) if '.' in str(rate) else 0
-            if decimal_places > range_info["decimal"]:
+            # 小数点以下の桁数チェック（文字列化せず整数倍で判定）
+            scaled = rate * 10 ** decimal
+            if abs(scaled - round(scaled)) > 1e-6:
                 return {
                     "valid": False,
-                    "error": f"{pair}の小数点以下は{range_info['decimal']}桁まで"
+                    "error": f"{pair}の小数点以下は{decimal}桁まで"
                 }
             
+            rounded = round(rate, decimal)
             return {
                 "valid": True,
-                "rate": round(rate, range_info["decimal"]),
-                "formatted_rate": round(rate, range_info["decimal"])
+                "rate": rounded,
+                "formatted_rate": rounded
             }
             
         except (ValueError, TypeError):
@@ -198,74 +421,83 @@ class ManualRateManager:
     
     def get_rate_info(self, pair: str) -> Dict[str, Any]:
         """レート情報取得"""
-        range_info = self.rate_ranges.get(pair, {"min": 0, "max": 1000, "decimal": 4})
+        min_rate, max_rate, decimal = self.rate_ranges.get(pair, (0, 1000, 4))
+        default_rate = self.default_rates.get(pair, 100.0)
         return {
             "pair": pair,
-            "min": range_info["min"],
-            "max": range_info["max"],
-            "decimal": range_info["decimal"],
-            "default": self.default_rates.get(pair, 100.0),
-            "example": f"{self.default_rates.get(pair, 100.0):.{range_info['decimal']}f}"
+            "min": min_rate,
+            "max": max_rate,
+            "decimal": decimal,
+            "default": default_rate,
+            "example": f"{default_rate:.{decimal}f}"
         }
 
 class EnhancedFXDataProvider:
     """強化されたFXデータプロバイダー（手動レート対応版）"""
     
     def __init__(self):
-        self.api_configs = [
-            {
-                "name": "exchangerate-api",
-                "url": "https://api.exchangerate-api.com/v4/latest/USD",
-                "timeout": 15,
-                "retries": 3,
-                "headers": {
-                    'User-Agent': 'Mozilla/5.0 (compatible; FX-Predictor/2.2)',
-                    'Accept': 'application/json',
-                    'Cache-Control': 'no-cache'
-                }
-            },
-            {
-                "name": "exchangerate-host",
-                "url": "https://api.exchangerate.host/latest?base=USD",
-                "timeout": 12,
-                "retries": 2,
-                "headers": {
-                    'User-Agent': 'Mozilla/5.0 (compatible; FX-Predictor/2.2)',
-                    'Accept': 'application/json'
-                }
-            },
-            {
-                "name": "fxratesapi",
-                "url": "https://api.fxratesapi.com/latest?base=USD",
-                "timeout": 10,
-                "retries": 2,
-                "headers": {
-                    'User-Agent': 'curl/7.64.1',
-                    'Accept': 'application/json'
-                }
-            },
-            {
-                "name": "vatcomply",
-                "url": "https://api.vatcomply.com/rates?base=USD",
-                "timeout": 8,
-                "retries": 1,
-                "headers": {
-                    'User-Agent': 'FX-Predictor-Bot/2.2',
-                    'Accept': 'application/json'
-                }
-            }
-        ]
+        self.api_configs = API_CONFIGS
         
-        self.fallback_rates = {
-            "USD/JPY": 147.49,
-            "EUR/JPY": 173.16,
-            "EUR/USD": 1.174
-        }
+        self.fallback_rates = BASE_RATES
         
         self.timezone_manager = TimezoneManager()
         self.manual_rate_manager = ManualRateManager()
         self.last_successful_api = None
         self.api_success_count = {}
+        
+        # Live APIレートのTTLキャッシュ（通貨ペア単位, 秒）
+        self.rate_cache_ttl = {
+            "USD/JPY": 30,
+            "EUR/JPY": 30,
+            "EUR/USD": 30
+        }
+        self._rate_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._rate_cache_lock = threading.Lock()
+        
+        # 実行中のLive API取得（同時のキャッシュミスは1回の取得に集約）
+        self._live_fetch: Optional[concurrent.futures.Future] = None
+        self._live_fetch_lock = threading.Lock()
+        
+        # 接続プール付きセッション（keep-aliveでTCP/TLSハンドシェイクを再利用）
+        self.session = None
+        if REQUESTS_AVAILABLE:
+            self.session = requests.Session()
+            # 再試行は_fetch_from_apiに一本化（アダプタ側では再試行しない）
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        else:
+            # urllibモード: スレッドごとにホスト別のKeep-Alive接続を保持
+            self._urllib_local = threading.local()
+        
+        # 再試行間隔の上限（秒）
+        self.retry_backoff_cap = 2.0
+        
+        # 同時に試行するAPI数（失敗時に次のAPIを追加投入）
+        self.hedge_width = 2
+        
+        # APIごとのサーキットブレーカー（連続失敗回数, オープン時刻, ハーフオープン試行開始時刻）
+        self.breaker_fail_threshold = 3
+        self.breaker_cooldown = 60
+        self._breaker = {
+            api_config.name: {"fails": 0, "opened_at": 0.0, "probe_started_at": 0.0} for api_config in self.api_configs
+        }
+        self._breaker_lock = threading.Lock()
+        
+        # APIごとの応答時間EWMA（秒）に基づく適応タイムアウト
+        self.initial_latency_estimate = 1.0
+        self.min_request_timeout = 1.0
+        self.connect_timeout = 3.0
+        self._latency_ewma = {
+            api_config.name: self.initial_latency_estimate for api_config in self.api_configs
+        }
+        self._latency_lock = threading.Lock()
+        
+        # API並行取得用スレッドプール
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(self.api_configs) * 2,
+            thread_name_prefix="fx-api"
+        )
     
     def get_real_fx_rate(self, pair: str, timezone: str = "UTC", manual_rate: Optional[float] = None) -> Dict[str, Any]:
         """FXレート取得（手動レート対応版）"""
@@ -276,157 +508,493 @@ class EnhancedFXDataProvider:
             if validation["valid"]:
                 return self._create_manual_rate_response(pair, validation["rate"], timezone)
             else:
-                print(f"⚠️ 手動レート検証失敗: {validation['error']}")
+                logger.warning("⚠️ 手動レート検証失敗: %s", validation['error'])
                 # 検証失敗時はAPI取得を試行
         
+        # 未対応の通貨ペアはどのAPIにも存在しないため問い合わせない
+        if pair not in CURRENCY_PAIRS:
+            logger.warning("⚠️ 未対応の通貨ペア: %s", pair)
+            return self._get_manual_input_fallback(pair, timezone)
+        
+        cached = self._get_cached_rate(pair, timezone)
+        if cached is not None:
+            return cached
+        
         if not REQUESTS_AVAILABLE:
-            print("⚠️ requests不可 - 標準ライブラリでAPI試行")
+            logger.debug("⚠️ requests不可 - 標準ライブラリでAPI試行")
             result = self._try_urllib_apis(pair, timezone)
             if result["source"] != "Live API":
                 # API失敗時は手動入力を促す
                 result["manual_input_required"] = True
                 result["rate_info"] = self.manual_rate_manager.get_rate_info(pair)
+            else:
+                self._store_cached_rate(pair, result)
             return result
         
-        print(f"🔄 Live API取得開始: {pair}")
+        logger.debug("🔄 Live API取得開始: %s", pair)
+        
+        rates = self._fetch_live_rates_collapsed(timezone, required_pair=pair)
+        if pair in rates:
+            return rates[pair]
+        
+        logger.warning("⚠️ 全API失敗 - 手動入力モードに移行")
+        result = self._get_manual_input_fallback(pair, timezone)
+        return result
+    
+    def get_all_rates(self, timezone: str = "UTC") -> Dict[str, Dict[str, Any]]:
+        """全通貨ペアのレートを1回のAPI取得でまとめて取得"""
+        results = {}
+        for pair in CURRENCY_PAIRS:
+            cached = self._get_cached_rate(pair, timezone)
+            if cached is not None:
+                results[pair] = cached
+        
+        missing_pairs = [pair for pair in CURRENCY_PAIRS if pair not in results]
+        if not missing_pairs:
+            return results
+        
+        if not REQUESTS_AVAILABLE:
+            for pair in missing_pairs:
+                results[pair] = self.get_real_fx_rate(pair, timezone)
+            return results
+        
+        logger.debug("🔄 Live API一括取得開始: %s", ', '.join(missing_pairs))
+        rates = self._fetch_live_rates_collapsed(timezone)
+        for pair in missing_pairs:
+            results[pair] = rates.get(pair) or self._get_manual_input_fallback(pair, timezone)
+        return results
+    
+    def _fetch_live_rates_collapsed(self, timezone: str, required_pair: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Live API取得（実行中の取得があれば完了を待ち、その結果をキャッシュから返す）"""
+        with self._live_fetch_lock:
+            inflight = self._live_fetch
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._live_fetch = concurrent.futures.Future()
+        
+        if not is_leader:
+            try:
+                inflight.result()
+            except Exception:
+                return {}
+            rates = {}
+            for pair in CURRENCY_PAIRS:
+                cached = self._get_cached_rate(pair, timezone)
+                if cached is not None:
+                    rates[pair] = cached
+            return rates
+        
+        try:
+            rates = self._fetch_live_rates(timezone, required_pair=required_pair)
+            inflight.set_result(None)
+            return rates
+        except Exception as e:
+            inflight.set_exception(e)
+            raise
+        finally:
+            with self._live_fetch_lock:
+                self._live_fetch = None
+    
+    def _fetch_live_rates(self, timezone: str, required_pair: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """全APIを並行して試行し、最初に成功したレスポンスから全通貨ペアを取得"""
+        
+        # サーキットが開いているAPIは除外
+        available_configs = [
+            (api_idx, api_config) for api_idx, api_config in enumerate(self.api_configs)
+            if not self._is_circuit_open(api_config.name)
+        ]
+        if not available_configs:
+            logger.warning("⚠️ 全APIがサーキットオープン中")
+            return {}
+        
+        # 前回成功したAPIを先頭に回す（それ以外は設定順を維持）
+        last_successful_api = self.last_successful_api
+        if last_successful_api is not None:
+            available_configs.sort(key=lambda item: item[1].name != last_successful_api)
+        
+        # 勝者確定後、実行中の他APIのリトライを打ち切るためのイベント
+        race_finished = threading.Event()
+        waiting_configs = iter(available_configs)
+        futures: Dict[concurrent.futures.Future, str] = {}
+        
+        def launch_next() -> Optional[concurrent.futures.Future]:
+            for api_idx, api_config in waiting_configs:
+                # ハーフオープン中のAPIは実際に送信する時点で試行枠を確保（確保済みならスキップ）
+                if not self._acquire_circuit(api_config.name):
+                    continue
+                future = self._executor.submit(
+                    self._fetch_from_api, api_idx, api_config, timezone, required_pair, race_finished
+                )
+                futures[future] = api_config.name
+                return future
+            return None
         
-        # 各APIを順番に試行（リトライ付き）
-        for api_idx, api_config in enumerate(self.api_configs):
-            api_name = api_config['name']
-            retries = api_config.get('retries', 1)
+        # 先頭hedge_width件を同時に試行し、失敗したら次のAPIを投入（ヘッジリクエスト）
+        in_flight = set()
+        for _ in range(self.hedge_width):
+            future = launch_next()
+            if future is not None:
+                in_flight.add(future)
+        
+        stages = -(-len(available_configs) // self.hedge_width)
+        max_wait = stages * max(
+            api_config.timeout * (api_config.retries + 1)
+            for _, api_config in available_configs
+        )
+        deadline = time.monotonic() + max_wait
+        
+        while in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("⏰ 全API応答待ちタイムアウト (%s秒)", max_wait)
+                break
             
-            for attempt in range(retries + 1):
-                try:
-                    print(f"🔄 [{api_idx+1}/{len(self.api_configs)}] {api_name} 試行 {attempt+1}/{retries+1}")
-                    
-                    session = requests.Session()
-                    session.headers.update(api_config['headers'])
+            done, in_flight = concurrent.futures.wait(
+                in_flight, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                rates = future.result()
+                if rates:
+                    api_name = futures[future]
+                    race_finished.set()
+                    self._cancel_pending(in_flight, futures)
                     
-                    response = session.get(
-                        api_config['url'],
-                        timeout=api_config['timeout'],
-                        allow_redirects=True,
-                        verify=True
-                    )
+                    self.last_successful_api = api_name
+                    self.api_success_count[api_name] = self.api_success_count.get(api_name, 0) + 1
+                    for pair, result in rates.items():
+                        self._store_cached_rate(pair, result)
                     
-                    if response.status_code == 200:
-                        data = response.json()
-                        result = self._parse_api_data(data, pair, timezone, api_name)
-                        
+                    return rates
+                
+                next_future = launch_next()
+                if next_future is not None:
+                    in_flight.add(next_future)
+        
+        race_finished.set()
+        self._cancel_pending(in_flight, futures)
+        
+        return {}
+    
+    def _cancel_pending(self, in_flight, futures: Dict[concurrent.futures.Future, str]) -> None:
+        """未開始の取得を取り消し、送信されなかったAPIのハーフオープン試行枠を解放"""
+        for other in in_flight:
+            if other.cancel():
+                self._release_probe(futures[other])
+    
+    def _fetch_from_api(self, api_idx: int, api_config: APIConfig, timezone: str,
+                        required_pair: Optional[str] = None,
+                        race_finished: Optional[threading.Event] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """単一APIから全通貨ペアのレート取得（リトライ付き）"""
+        api_name = api_config.name
+        retries = api_config.retries
+        
+        for attempt in range(retries + 1):
+            if race_finished is not None and race_finished.is_set():
+                # 他APIで取得済み - 失敗扱いにせず終了（未送信なら試行枠も解放）
+                if attempt == 0:
+                    self._release_probe(api_name)
+                return None
+            try:
+                logger.debug("🔄 [%d/%d] %s 試行 %d/%d", api_idx + 1, len(self.api_configs), api_name, attempt + 1, retries + 1)
+                
+                started_at = time.monotonic()
+                response = self.session.get(
+                    api_config.url,
+                    headers=api_config.headers,
+                    timeout=self._request_timeouts(api_config),
+                    allow_redirects=True,
+                    verify=True
+                )
+                
+                if response.status_code == 200:
+                    # 応答時間の推定には正常応答のみ使用（高速なエラー応答で過小評価しない）
+                    self._record_latency(api_name, time.monotonic() - started_at)
+                    data = _json_loads(response.content)
+                    timestamps = self._timestamp_fields(timezone)
+                    rates = {}
+                    for pair in CURRENCY_PAIRS:
+                        result = self._parse_api_data(data, pair, timezone, api_name, timestamps)
                         if result and result.get('rate', 0) > 0:
-                            print(f"✅ {api_name} API成功! {pair} = {result['rate']}")
-                            
-                            self.last_successful_api = api_name
-                            self.api_success_count[api_name] = self.api_success_count.get(api_name, 0) + 1
-                            
-                            return result
-                    else:
-                        print(f"⚠️ {api_name} HTTP {response.status_code}: {response.reason}")
-                        
-                except requests.exceptions.Timeout:
-                    print(f"⏰ {api_name} タイムアウト (試行 {attempt+1})")
-                    time.sleep(0.5)
-                    continue
+                            rates[pair] = result
                     
-                except requests.exceptions.ConnectionError:
-                    print(f"🔌 {api_name} 接続エラー (試行 {attempt+1})")
-                    time.sleep(0.5)
-                    continue
+                    if not rates:
+                        # 正常応答だが有効なレートなし - 再送しても同じ内容のため再試行しない
+                        break
                     
-                except requests.exceptions.RequestException as e:
-                    print(f"⚠️ {api_name} リクエストエラー: {str(e)[:100]}")
-                    continue
+                    # 応答自体は正常なのでAPIの障害としては扱わない
+                    self._record_api_result(api_name, success=True)
+                    if required_pair is None or required_pair in rates:
+                        summary = ", ".join(f"{pair} = {result['rate']}" for pair, result in rates.items())
+                        logger.info("✅ %s API成功! %s", api_name, summary)
+                        return rates
                     
-                except json.JSONDecodeError:
-                    print(f"⚠️ {api_name} JSON解析エラー")
-                    continue
+                    # 必要な通貨ペアのみ欠けている場合は取得分をキャッシュし、他APIに任せる
+                    logger.warning("⚠️ %s %s のレートなし", api_name, required_pair)
+                    for pair, result in rates.items():
+                        self._store_cached_rate(pair, result)
+                    return None
+                else:
+                    logger.warning("⚠️ %s HTTP %s: %s", api_name, response.status_code, response.reason)
+                    if response.status_code not in RETRYABLE_STATUS:
+                        break
+                    self._wait_before_retry(attempt, retries, race_finished)
                     
-                except Exception as e:
-                    print(f"⚠️ {api_name} 予期しないエラー: {str(e)[:100]}")
-                    continue
+            except requests.exceptions.Timeout:
+                logger.warning("⏰ %s タイムアウト (試行 %d)", api_name, attempt + 1)
+                self._record_timeout(api_config)
+                self._wait_before_retry(attempt, retries, race_finished)
+                continue
+                
+            except requests.exceptions.ConnectionError:
+                logger.warning("🔌 %s 接続エラー (試行 %d)", api_name, attempt + 1)
+                self._wait_before_retry(attempt, retries, race_finished)
+                continue
+                
+            except requests.exceptions.RequestException as e:
+                logger.warning("⚠️ %s リクエストエラー: %.100s", api_name, e)
+                continue
+                
+            except json.JSONDecodeError:
+                logger.warning("⚠️ %s JSON解析エラー", api_name)
+                continue
+                
+            except Exception as e:
+                logger.warning("⚠️ %s 予期しないエラー: %.100s", api_name, e)
+                continue
         
-        print("⚠️ 全API失敗 - 手動入力モードに移行")
-        result = self._get_manual_input_fallback(pair, timezone)
+        self._record_api_result(api_name, success=False)
+        return None
+    
+    def _effective_timeout(self, api_config: APIConfig) -> float:
+        """実測レイテンシ(EWMA)の3倍を上限設定値の範囲で適用"""
+        with self._latency_lock:
+            latency = self._latency_ewma.get(api_config.name, self.initial_latency_estimate)
+        return max(self.min_request_timeout, min(api_config.timeout, 3 * latency))
+    
+    def _request_timeouts(self, api_config: APIConfig) -> Tuple[float, float]:
+        """(接続, 読み取り)タイムアウト - 応答しないホストは接続段階で早期に諦める"""
+        read_timeout = self._effective_timeout(api_config)
+        return min(self.connect_timeout, read_timeout), read_timeout
+    
+    def _record_latency(self, api_name: str, elapsed: float) -> None:
+        """応答時間のEWMA更新"""
+        with self._latency_lock:
+            previous = self._latency_ewma.get(api_name, self.initial_latency_estimate)
+            self._latency_ewma[api_name] = 0.8 * previous + 0.2 * elapsed
+    
+    def _record_timeout(self, api_config: APIConfig) -> None:
+        """タイムアウト時は推定値を倍増し、遅いAPIでも次回は待てるようにする"""
+        api_name = api_config.name
+        with self._latency_lock:
+            previous = self._latency_ewma.get(api_name, self.initial_latency_estimate)
+            self._latency_ewma[api_name] = min(api_config.timeout, previous * 2)
+    
+    def _retry_backoff(self, attempt: int) -> float:
+        """指数バックオフ（上限付き） + ジッターの待機秒数"""
+        return min(self.retry_backoff_cap, 0.1 * (2 ** attempt)) * random.uniform(0.5, 1.5)
+    
+    def _wait_before_retry(self, attempt: int, retries: int,
+                           race_finished: Optional[threading.Event] = None) -> None:
+        """再試行前の待機（最終試行後は待たない, 他APIで取得済みなら即終了）"""
+        if attempt >= retries:
+            return
+        backoff = self._retry_backoff(attempt)
+        if race_finished is not None:
+            race_finished.wait(backoff)
+        else:
+            time.sleep(backoff)
+    
+    def _circuit_blocks(self, state: Optional[Dict[str, float]], now: float) -> bool:
+        """ブレーカー状態が送信を止めているか（呼び出し側で_breaker_lockを保持）"""
+        if state is None or state["fails"] < self.breaker_fail_threshold:
+            return False
+        if now - state["opened_at"] < self.breaker_cooldown:
+            return True
+        # ハーフオープン: クールダウン明けは1件だけ試行を通す（試行が終わらなければ次の周期で再度許可）
+        return now - state["probe_started_at"] < self.breaker_cooldown
+    
+    def _is_circuit_open(self, api_name: str) -> bool:
+        """連続失敗したAPIをクールダウン期間中スキップするか判定（状態は変更しない）"""
+        with self._breaker_lock:
+            return self._circuit_blocks(self._breaker.get(api_name), time.monotonic())
+    
+    def _acquire_circuit(self, api_name: str) -> bool:
+        """送信直前の判定（ハーフオープン時はここで試行枠を確保）"""
+        with self._breaker_lock:
+            state = self._breaker.get(api_name)
+            now = time.monotonic()
+            if self._circuit_blocks(state, now):
+                return False
+            if state is not None and state["fails"] >= self.breaker_fail_threshold:
+                state["probe_started_at"] = now
+                logger.info("🔎 %s サーキットハーフオープン (試行1件)", api_name)
+            return True
+    
+    def _release_probe(self, api_name: str) -> None:
+        """送信せずに終わった取得のハーフオープン試行枠を解放"""
+        with self._breaker_lock:
+            state = self._breaker.get(api_name)
+            if state is not None:
+                state["probe_started_at"] = 0.0
+    
+    def _record_api_result(self, api_name: str, success: bool) -> None:
+        """サーキットブレーカーの状態更新"""
+        with self._breaker_lock:
+            state = self._breaker.setdefault(api_name, {"fails": 0, "opened_at": 0.0, "probe_started_at": 0.0})
+            was_open = state["fails"] >= self.breaker_fail_threshold
+            state["probe_started_at"] = 0.0
+            if success:
+                state["fails"] = 0
+                if was_open:
+                    logger.info("✅ %s サーキットクローズ (復旧)", api_name)
+                return
+            state["fails"] += 1
+            state["opened_at"] = time.monotonic()
+            if state["fails"] >= self.breaker_fail_threshold:
+                logger.warning("🚫 %s サーキットオープン (%s秒間スキップ)", api_name, self.breaker_cooldown)
+    
+    def _timestamp_fields(self, timezone: str, now: Optional[datetime.datetime] = None) -> Tuple[str, str]:
+        """取得時刻(UTC)と指定タイムゾーンでの現地時刻のISO文字列"""
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+        timestamp = now.isoformat()
+        localized_time = self.timezone_manager.convert_to_timezone(now, timezone)
+        return timestamp, localized_time.isoformat() if localized_time else timestamp
+    
+    def _get_cached_rate(self, pair: str, timezone: str) -> Optional[Dict[str, Any]]:
+        """TTL内のLive APIレートをキャッシュから取得"""
+        with self._rate_cache_lock:
+            entry = self._rate_cache.get(pair)
+        
+        if entry is None:
+            return None
+        
+        fetched_at, cached = entry
+        if time.monotonic() - fetched_at >= self.rate_cache_ttl.get(pair, 30):
+            return None
+        
+        result = dict(cached)
+        if result.get("timezone") != timezone:
+            # タイムゾーン依存の項目のみ再計算
+            fetched_time = datetime.datetime.fromisoformat(result["timestamp"])
+            _, result["localized_timestamp"] = self._timestamp_fields(timezone, fetched_time)
+            result["timezone"] = timezone
         return result
     
+    def invalidate(self, pair: Optional[str] = None) -> None:
+        """Live APIレートのキャッシュ破棄（pair省略時は全通貨ペア）"""
+        with self._rate_cache_lock:
+            if pair is None:
+                self._rate_cache.clear()
+            else:
+                self._rate_cache.pop(pair, None)
+    
+    def _store_cached_rate(self, pair: str, result: Dict[str, Any]) -> None:
+        """Live APIレートをキャッシュに保存"""
+        with self._rate_cache_lock:
+            self._rate_cache[pair] = (time.monotonic(), dict(result))
+    
     def _try_urllib_apis(self, pair: str, timezone: str) -> Dict[str, Any]:
-        """標準ライブラリでのAPI試行"""
+        """標準ライブラリでのAPI試行（全URLを並行して試行し、最初の成功を採用）"""
         simple_apis = [
             "https://api.exchangerate-api.com/v4/latest/USD",
             "https://api.exchangerate.host/latest?base=USD"
         ]
+        urllib_timeout = 10
         
-        for api_url in simple_apis:
-            try:
-                print(f"🔄 urllib試行: {api_url}")
-                
-                req = urllib.request.Request(
-                    api_url,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (compatible; FX-Predictor/2.2)',
-                        'Accept': 'application/json'
-                    }
-                )
-                
-                with urllib.request.urlopen(req, timeout=10) as response:
-                    if response.getcode() == 200:
-                        data = json.loads(response.read().decode())
-                        result = self._parse_api_data(data, pair, timezone, "urllib")
-                        
-                        if result and result.get('rate', 0) > 0:
-                            print(f"✅ urllib API成功! {pair} = {result['rate']}")
-                            return result
-                            
-            except Exception as e:
-                print(f"⚠️ urllib API失敗: {str(e)[:100]}")
-                continue
+        futures = [
+            self._executor.submit(self._fetch_urllib_api, api_url, pair, timezone, urllib_timeout)
+            for api_url in simple_apis
+        ]
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=urllib_timeout * 2):
+                result = future.result()
+                if result is not None:
+                    for other in futures:
+                        other.cancel()
+                    return result
+        except concurrent.futures.TimeoutError:
+            logger.warning("⏰ urllib API応答待ちタイムアウト (%s秒)", urllib_timeout * 2)
         
         return self._get_manual_input_fallback(pair, timezone)
     
-    def _parse_api_data(self, data: Dict, pair: str, timezone: str, api_name: str) -> Optional[Dict[str, Any]]:
-        """統一API データ解析"""
+    def _fetch_urllib_api(self, api_url: str, pair: str, timezone: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """標準ライブラリで単一URLからレート取得（失敗時はNone）"""
         try:
-            if 'rates' in data and 'base' in data:
-                rates = data['rates']
-                
-                if pair == "USD/JPY":
-                    rate = rates.get("JPY")
-                elif pair == "EUR/JPY":
-                    eur_rate = rates.get("EUR", 0)
-                    jpy_rate = rates.get("JPY", 0)
-                    rate = jpy_rate / eur_rate if eur_rate > 0 else None
-                elif pair == "EUR/USD":
-                    eur_rate = rates.get("EUR", 0)
-                    rate = 1 / eur_rate if eur_rate > 0 else None
-                else:
-                    rate = None
+            logger.debug("🔄 urllib試行: %s", api_url)
             
-            elif 'rates' in data:
-                rates = data['rates']
-                if pair == "USD/JPY":
-                    rate = rates.get("JPY")
-                elif pair == "EUR/JPY":
-                    eur_rate = rates.get("EUR", 0)
-                    jpy_rate = rates.get("JPY", 0)
-                    rate = jpy_rate / eur_rate if eur_rate > 0 else None
-                elif pair == "EUR/USD":
-                    rate = rates.get("EUR")
-                else:
-                    rate = None
-            
-            else:
-                print(f"⚠️ {api_name} 未知のデータ形式")
+            data = self._urllib_get_json(api_url, timeout=timeout)
+            if data is not None:
+                result = self._parse_api_data(data, pair, timezone, "urllib")
+                
+                if result and result.get('rate', 0) > 0:
+                    logger.info("✅ urllib API成功! %s = %s", pair, result['rate'])
+                    return result
+                    
+        except Exception as e:
+            logger.warning("⚠️ urllib API失敗: %.100s", e)
+        
+        return None
+    
+    def _urllib_get_json(self, api_url: str, timeout: float) -> Optional[Any]:
+        """標準ライブラリでのGET（ホストごとの接続を再利用, 200以外はNone）"""
+        parts = urllib.parse.urlsplit(api_url)
+        connections = getattr(self._urllib_local, "connections", None)
+        if connections is None:
+            connections = self._urllib_local.connections = {}
+        
+        conn = connections.get(parts.netloc)
+        reused = conn is not None
+        path = parts.path + ("?" + parts.query if parts.query else "")
+        
+        while True:
+            if conn is None:
+                conn = http.client.HTTPSConnection(parts.netloc, timeout=timeout)
+                connections[parts.netloc] = conn
+            try:
+                conn.request("GET", path, headers={
+                    'User-Agent': 'Mozilla/5.0 (compatible; FX-Predictor/2.2)',
+                    'Accept': 'application/json'
+                })
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                # 切断された接続は破棄し、次回は新規接続
+                conn.close()
+                connections.pop(parts.netloc, None)
+                # アイドル中にサーバー側で閉じられた再利用接続は、新規接続で1回だけ再送
+                if reused and isinstance(e, (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)):
+                    logger.debug("🔌 再利用接続が切断済み - 新規接続で再試行: %s", parts.netloc)
+                    reused = False
+                    conn = None
+                    continue
+                raise
+        
+        if response.status != 200:
+            return None
+        return _json_loads(body)
+    
+    def _parse_api_data(self, data: Dict, pair: str, timezone: str, api_name: str,
+                        timestamps: Optional[Tuple[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """統一API データ解析"""
+        try:
+            rates = data.get('rates')
+            if not isinstance(rates, dict):
+                logger.warning("⚠️ %s 未知のデータ形式", api_name)
                 return None
             
+            extract = _PAIR_EXTRACT.get(pair)
+            rate = extract(rates) if extract is not None else None
+            
             if rate and self._validate_rate(pair, rate):
-                current_time = datetime.datetime.now()
-                localized_time = self.timezone_manager.convert_to_timezone(current_time, timezone)
+                timestamp, localized_timestamp = timestamps or self._timestamp_fields(timezone)
                 
                 return {
                     "rate": round(float(rate), 4),
                     "source": "Live API",
-                    "timestamp": current_time.isoformat(),
-                    "localized_timestamp": localized_time.isoformat() if localized_time else current_time.isoformat(),
+                    "timestamp": timestamp,
+                    "localized_timestamp": localized_timestamp,
                     "timezone": timezone,
                     "base_currency": data.get("base", "USD"),
                     "api_provider": api_name,
@@ -434,43 +1002,38 @@ class EnhancedFXDataProvider:
                     "manual_input_required": False
                 }
             else:
-                print(f"⚠️ {api_name} 無効なレート: {rate}")
+                logger.warning("⚠️ %s 無効なレート: %s", api_name, rate)
                 return None
                 
         except Exception as e:
-            print(f"⚠️ {api_name} データ解析エラー: {e}")
+            logger.warning("⚠️ %s データ解析エラー: %s", api_name, e)
             return None
     
     def _validate_rate(self, pair: str, rate: float) -> bool:
         """レート妥当性検証"""
         try:
-            rate = float(rate)
+            # JSON由来の値は通常すでにfloat - 変換はそれ以外の場合のみ
+            if type(rate) is not float:
+                rate = float(rate)
             
-            ranges = {
-                "USD/JPY": (80.0, 250.0),
-                "EUR/JPY": (100.0, 300.0),
-                "EUR/USD": (0.5, 2.0)
-            }
-            
-            if pair in ranges:
-                min_rate, max_rate = ranges[pair]
-                return min_rate <= rate <= max_rate
-            
-            return rate > 0
+            bounds = VALID_RATE_RANGES.get(pair)
+            if bounds is None:
+                return rate > 0
+            min_rate, max_rate, _ = bounds
+            return min_rate <= rate <= max_rate
             
         except (ValueError, TypeError):
             return False
     
     def _create_manual_rate_response(self, pair: str, rate: float, timezone: str) -> Dict[str, Any]:
         """手動レートレスポンス作成"""
-        current_time = datetime.datetime.now()
-        localized_time = self.timezone_manager.convert_to_timezone(current_time, timezone)
+        timestamp, localized_timestamp = self._timestamp_fields(timezone)
         
         return {
             "rate": round(rate, 4),
             "source": "Manual Input",
-            "timestamp": current_time.isoformat(),
-            "localized_timestamp": localized_time.isoformat() if localized_time else current_time.isoformat(),
+            "timestamp": timestamp,
+            "localized_timestamp": localized_timestamp,
             "timezone": timezone,
             "base_currency": "USD",
             "api_provider": "manual-user-input",
@@ -483,14 +1046,13 @@ class EnhancedFXDataProvider:
         """手動入力フォールバック"""
         base_rate = self.fallback_rates.get(pair, 100.0)
         
-        current_time = datetime.datetime.now()
-        localized_time = self.timezone_manager.convert_to_timezone(current_time, timezone)
+        timestamp, localized_timestamp = self._timestamp_fields(timezone)
         
         return {
             "rate": round(base_rate, 4),
             "source": "Manual Input Required",
-            "timestamp": current_time.isoformat(),
-            "localized_timestamp": localized_time.isoformat() if localized_time else current_time.isoformat(),
+            "timestamp": timestamp,
+            "localized_timestamp": localized_timestamp,
             "timezone": timezone,
             "base_currency": "USD",
             "api_provider": "fallback-manual-required",
@@ -504,16 +1066,13 @@ class FXPredictor:
     """FX予測エンジン（手動レート対応版）"""
     
     def __init__(self):
-        self.currency_pairs = ["USD/JPY", "EUR/JPY", "EUR/USD"]
+        self.currency_pairs = CURRENCY_PAIRS
         self.data_provider = EnhancedFXDataProvider()
         self.business_calc = BusinessDayCalculator()
         self.timezone_manager = TimezoneManager()
+        self._rng = random.Random()
         
-        self.base_rates = {
-            "USD/JPY": 147.49,
-            "EUR/JPY": 173.16,
-            "EUR/USD": 1.174
-        }
+        self.base_rates = BASE_RATES
     
     def get_current_rate(self, pair: str, timezone: str = "UTC", manual_rate: Optional[float] = None) -> Dict[str, Any]:
         """現在レート取得（手動レート対応版）"""
@@ -523,64 +1082,43 @@ class FXPredictor:
         """テクニカル指標計算"""
         if len(rates) < 5:
             rates = [self.base_rates["USD/JPY"]] * 5
-            
-        ma5 = sum(rates[-5:]) / 5
-        ma10 = sum(rates[-10:]) / min(10, len(rates))
-        
-        gains = []
-        losses = []
-        for i in range(1, len(rates)):
-            change = rates[i] - rates[i-1]
-            if change > 0:
-                gains.append(change)
-                losses.append(0)
-            else:
-                gains.append(0)
-                losses.append(abs(change))
         
-        avg_gain = sum(gains[-14:]) / min(14, len(gains)) if gains else 0.01
-        avg_loss = sum(losses[-14:]) / min(14, len(losses)) if losses else 0.01
-        rs = avg_gain / avg_loss if avg_loss != 0 else 1
-        rsi = 100 - (100 / (1 + rs))
+        ma5, ma10, rsi = _compute_technical_indicators(rates)
         
         return {
-            "ma5": round(ma5, 4),
-            "ma10": round(ma10, 4),
-            "rsi": round(rsi, 2)
+            "ma5": ma5,
+            "ma10": ma10,
+            "rsi": rsi
         }
     
     def predict_rate(self, pair: str, days_ahead: int = 1, use_business_days: bool = False, 
                     timezone: str = "UTC", country: str = "JP", manual_rate: Optional[float] = None) -> Dict[str, Any]:
         """レート予測（手動レート対応版）"""
-        
-        # 現在レート取得
+        return self._predict_batch(pair, [days_ahead], use_business_days, timezone, country, manual_rate)[0]
+    
+    def _gather_inputs(self, pair: str, timezone: str,
+                       manual_rate: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float], float]:
+        """予測日数に依存しない入力（現在レート, テクニカル指標, トレンド係数）の算出"""
         current_data = self.get_current_rate(pair, timezone, manual_rate)
         current_rate = current_data["rate"]
         
-        # 営業日計算
-        current_date = datetime.date.today()
-        if use_business_days and DATEUTIL_AVAILABLE:
-            target_date = self.business_calc.add_business_days(current_date, days_ahead, country)
-            actual_days = (target_date - current_date).days
-        else:
-            target_date = current_date + datetime.timedelta(days=days_ahead)
-            actual_days = days_ahead
+        # 過去データシミュレーション（最新値は現在レートで置き換え）
+        uniform = self._rng.uniform
+        variations = [uniform(-0.008, 0.008) for _ in range(SIMULATED_HISTORY_DAYS)]
         
-        # 過去データシミュレーション
         historical_rates = []
         base_rate = current_rate
-        for i in range(30, 0, -1):
-            variation = random.uniform(-0.008, 0.008)
+        for variation in variations:
             rate = base_rate * (1 + variation)
             historical_rates.append(rate)
             base_rate = rate * 0.999
         
         historical_rates[-1] = current_rate
         
-        # テクニカル指標計算
-        indicators = self.calculate_technical_indicators(historical_rates)
+        # テクニカル指標計算（指標が参照する末尾HISTORY_LENGTH本のみ渡す）
+        indicators = self.calculate_technical_indicators(historical_rates[-HISTORY_LENGTH:])
         
-        # 予測計算
+        # トレンド係数（予測日数に依存しない部分）
         trend_factor = 1.0
         if indicators["ma5"] > indicators["ma10"]:
             trend_factor = 1.0005
@@ -592,49 +1130,81 @@ class FXPredictor:
         elif indicators["rsi"] < 30:
             trend_factor *= 1.0005
         
-        uncertainty_factor = 1 + (actual_days * 0.001)
-        if use_business_days:
-            uncertainty_factor *= 0.95
-        
-        volatility = random.uniform(-0.003, 0.003) * uncertainty_factor
-        predicted_rate = current_rate * (trend_factor ** actual_days) * (1 + volatility)
-        
-        # 信頼度計算
-        base_confidence = max(70, 90 - (actual_days * 2))
-        if use_business_days:
-            base_confidence += 5
-        if current_data["source"] == "Live API":
-            base_confidence += 10
-        elif current_data["source"] == "Manual Input":
-            base_confidence += 8  # 手動入力も高信頼度
-        confidence = min(95, base_confidence)
-        
-        result = {
-            "current_rate": current_rate,
-            "current_data_source": current_data["source"],
-            "predicted_rate": round(predicted_rate, 4),
-            "change": round(predicted_rate - current_rate, 4),
-            "change_percent": round((predicted_rate - current_rate) / current_rate * 100, 2),
-            "confidence": confidence,
-            "indicators": indicators,
-            "days_ahead": days_ahead,
-            "actual_days": actual_days,
-            "target_date": target_date.isoformat(),
-            "use_business_days": use_business_days,
-            "timezone": timezone,
-            "data_timestamp": current_data["timestamp"],
-            "localized_timestamp": current_data.get("localized_timestamp"),
-            "market_info": self._get_market_info(pair, timezone),
-            "api_provider": current_data.get("api_provider", "unknown"),
-            "data_quality": current_data.get("data_quality", "unknown")
-        }
+        return current_data, indicators, trend_factor
+    
+    def _predict_batch(self, pair: str, days_list: List[int], use_business_days: bool = False,
+                       timezone: str = "UTC", country: str = "JP", manual_rate: Optional[float] = None) -> List[Dict[str, Any]]:
+        """複数の予測日数をまとめて計算（現在レート・過去データ・指標は1回のみ算出）"""
+        current_data, indicators, trend_factor = self._gather_inputs(pair, timezone, manual_rate)
+        current_rate = current_data["rate"]
+        volatilities = [self._rng.uniform(-0.003, 0.003) for _ in days_list]
         
-        # 手動入力が必要な場合の追加情報
-        if current_data.get("manual_input_required", False):
-            result["manual_input_required"] = True
-            result["rate_info"] = current_data.get("rate_info", {})
+        # 営業日計算（全予測日数を1回の走査で算出）
+        current_date = datetime.date.today()
+        business_day_mode = use_business_days and DATEUTIL_AVAILABLE
+        if business_day_mode:
+            target_dates = self.business_calc.add_business_days_multi(current_date, days_list, country)
+        else:
+            target_dates = [current_date + datetime.timedelta(days=days_ahead) for days_ahead in days_list]
+        
+        # 指標・市場情報は全予測日で共通（同一の辞書を共有）
+        market_info = self._get_market_info(pair, timezone)
+        
+        # 予測日数に依存しない係数・項目
+        uncertainty_scale = 0.95 if use_business_days else 1.0
+        confidence_bonus = 5 if use_business_days else 0
+        source = current_data["source"]
+        if source == "Live API":
+            confidence_bonus += 10
+        elif source == "Manual Input":
+            confidence_bonus += 8  # 手動入力も高信頼度
+        
+        data_timestamp = current_data["timestamp"]
+        localized_timestamp = current_data.get("localized_timestamp")
+        api_provider = current_data.get("api_provider", "unknown")
+        data_quality = current_data.get("data_quality", "unknown")
+        manual_input_required = current_data.get("manual_input_required", False)
         
-        return result
+        predictions = []
+        for days_ahead, target_date, volatility in zip(days_list, target_dates, volatilities):
+            actual_days = (target_date - current_date).days if business_day_mode else days_ahead
+            
+            # 予測計算
+            volatility *= (1 + (actual_days * 0.001)) * uncertainty_scale
+            predicted_rate = current_rate * (trend_factor ** actual_days) * (1 + volatility)
+            change = predicted_rate - current_rate
+            
+            # 信頼度計算
+            confidence = min(95, max(70, 90 - (actual_days * 2)) + confidence_bonus)
+            
+            result = {
+                "current_rate": current_rate,
+                "current_data_source": source,
+                "predicted_rate": round(predicted_rate, 4),
+                "change": round(change, 4),
+                "change_percent": round(change / current_rate * 100, 2),
+                "confidence": confidence,
+                "indicators": indicators,
+                "days_ahead": days_ahead,
+                "actual_days": actual_days,
+                "target_date": target_date.isoformat(),
+                "use_business_days": use_business_days,
+                "timezone": timezone,
+                "data_timestamp": data_timestamp,
+                "localized_timestamp": localized_timestamp,
+                "market_info": market_info,
+                "api_provider": api_provider,
+                "data_quality": data_quality
+            }
+            
+            # 手動入力が必要な場合の追加情報
+            if manual_input_required:
+                result["manual_input_required"] = True
+                result["rate_info"] = current_data.get("rate_info", {})
+            
+            predictions.append(result)
+        
+        return predictions
     
     def _get_market_info(self, pair: str, timezone: str) -> Dict[str, Any]:
         """市場情報取得"""
@@ -642,14 +1212,14 @@ class FXPredictor:
             return {"status": "unavailable"}
         
         try:
-            if "JPY" in pair:
-                primary_market = "Tokyo"
-            elif "EUR" in pair:
-                primary_market = "London"
-            elif "USD" in pair:
-                primary_market = "New_York"
-            else:
-                primary_market = "London"
+            primary_market = PRIMARY_MARKETS.get(pair)
+            if primary_market is None:
+                if "JPY" in pair:
+                    primary_market = "Tokyo"
+                elif "USD" in pair and "EUR" not in pair:
+                    primary_market = "New_York"
+                else:
+                    primary_market = "London"
             
             is_open = self.timezone_manager.is_market_open(primary_market)
             
@@ -664,23 +1234,10 @@ class FXPredictor:
     def predict_multi_day(self, pair: str, days: int = 10, use_business_days: bool = False,
                          timezone: str = "UTC", country: str = "JP", manual_rate: Optional[float] = None) -> List[Dict[str, Any]]:
         """複数日予測（手動レート対応版）"""
-        predictions = []
-        for day in range(1, days + 1):
-            prediction = self.predict_rate(pair, day, use_business_days, timezone, country, manual_rate)
-            predictions.append(prediction)
-        return predictions
+        return self._predict_batch(pair, list(range(1, days + 1)), use_business_days, timezone, country, manual_rate)
 
 # WebサーバーとHTMLテンプレート（手動レート入力UI追加）
-class FXWebServer:
-    """FXWebサーバー（手動レート対応版）"""
-    
-    def __init__(self, port: int = 8080):
-        self.port = port
-        self.predictor = FXPredictor()
-        
-    def get_html_template(self) -> str:
-        """HTMLテンプレート（手動レート入力機能付き）"""
-        return """
+HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="ja">
 <head>
@@ -1492,108 +2049,484 @@ class FXWebServer:
 </html>
         """
 
+# 配信用に一度だけエンコード・圧縮しておく
+_HTML_TEMPLATE_BYTES = HTML_TEMPLATE.encode('utf-8')
+_HTML_TEMPLATE_GZIP = gzip.compress(_HTML_TEMPLATE_BYTES, 9)
+_HTML_TEMPLATE_LENGTH = str(len(_HTML_TEMPLATE_BYTES))
+_HTML_TEMPLATE_GZIP_LENGTH = str(len(_HTML_TEMPLATE_GZIP))
+# 強いETagはContent-Encodingごとに別の値にする（gzip版は末尾に-gzip）
+_HTML_TEMPLATE_DIGEST = hashlib.sha256(_HTML_TEMPLATE_BYTES).hexdigest()[:32]
+_HTML_TEMPLATE_ETAG = '"%s"' % _HTML_TEMPLATE_DIGEST
+_HTML_TEMPLATE_GZIP_ETAG = '"%s-gzip"' % _HTML_TEMPLATE_DIGEST
+HTML_CACHE_CONTROL = 'public, max-age=3600'
+
+class FXWebServer:
+    """FXWebサーバー（手動レート対応版）"""
+    
+    def __init__(self, port: int = 8080):
+        self.port = port
+        self.predictor = FXPredictor()
+        
+    def get_html_template(self) -> str:
+        """HTMLテンプレート（手動レート入力機能付き）"""
+        return HTML_TEMPLATE
+
+# 予測APIの同時実行上限（スレッドサーバーでの過負荷対策）
+MAX_CONCURRENT_PREDICTIONS = 16
+PREDICTION_SLOT_TIMEOUT = 10
+_PREDICTION_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_PREDICTIONS)
+
+# この長さ(バイト)を超えるJSONレスポンスはgzip圧縮して返す
+JSON_GZIP_MIN_BYTES = 1024
+
+# 予測APIレスポンスのTTLキャッシュ（期限切れ後もエラー時の代替用に保持）
+RESPONSE_CACHE_TTL = {"single": 5.0, "multi": 15.0}
+RESPONSE_CACHE_MAX_ENTRIES = 256
+_RESPONSE_CACHE: Dict[tuple, Tuple[float, bytes]] = {}
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _lookup_cached_response(key: tuple) -> Optional[Tuple[float, bytes]]:
+    with _RESPONSE_CACHE_LOCK:
+        return _RESPONSE_CACHE.get(key)
+
+def _store_cached_response(key: tuple, payload: bytes, age: float = 0.0) -> None:
+    """ローカルキャッシュへ保存（ageは保存時点での経過秒数, 共有キャッシュからの複製時に使用）"""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.pop(key, None)
+        _RESPONSE_CACHE[key] = (time.monotonic() - age, payload)
+        # 最も古いエントリから削除
+        while len(_RESPONSE_CACHE) > RESPONSE_CACHE_MAX_ENTRIES:
+            del _RESPONSE_CACHE[next(iter(_RESPONSE_CACHE))]
+
+# インスタンス間で共有する応答キャッシュ（Redis, 任意）
+# 期限切れ後もSHARED_CACHE_RETENTIONの間は障害時の代替応答として保持する
+SHARED_CACHE_RETENTION = 3600
+SHARED_CACHE_SOCKET_TIMEOUT = 0.2
+_REDIS_CLIENT = None
+if REDIS_AVAILABLE and os.environ.get('REDIS_URL'):
+    try:
+        _REDIS_CLIENT = redis.Redis.from_url(
+            os.environ['REDIS_URL'],
+            socket_timeout=SHARED_CACHE_SOCKET_TIMEOUT,
+            socket_connect_timeout=SHARED_CACHE_SOCKET_TIMEOUT
+        )
+    except (ValueError, redis.RedisError) as e:
+        # 不正なREDIS_URLではプロセス内キャッシュのみで動作
+        logger.warning("⚠️ REDIS_URL解析失敗 - 共有キャッシュ無効: %s", e)
+
+def _shared_cache_key(key: tuple) -> str:
+    """キー要素をJSON配列として符号化してからハッシュ（区切り文字を含む値でも衝突しない）"""
+    return "fx:v2:" + hashlib.sha256(_json_dumps(list(key))).hexdigest()
+
+def _lookup_shared_response(key: tuple) -> Optional[Tuple[float, bytes]]:
+    """共有キャッシュ参照 -> (生成時刻(UNIX時間), 本文)"""
+    if _REDIS_CLIENT is None:
+        return None
+    try:
+        body, generated_at = _REDIS_CLIENT.hmget(_shared_cache_key(key), "body", "generated_at")
+    except redis.RedisError as e:
+        logger.warning("⚠️ 共有キャッシュ参照失敗: %s", e)
+        return None
+    if body is None or generated_at is None:
+        return None
+    return float(generated_at), body
+
+def _store_shared_response(key: tuple, payload: bytes) -> None:
+    if _REDIS_CLIENT is None:
+        return
+    name = _shared_cache_key(key)
+    try:
+        pipe = _REDIS_CLIENT.pipeline()
+        pipe.hset(name, mapping={"body": payload, "generated_at": time.time()})
+        pipe.expire(name, SHARED_CACHE_RETENTION)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("⚠️ 共有キャッシュ保存失敗: %s", e)
+
+# 同一キーの予測を同時に1回だけ実行（後続リクエストは結果を待つ）
+_INFLIGHT: Dict[tuple, concurrent.futures.Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+def _compute_single_flight(key: tuple, compute) -> bytes:
+    """予測を実行してキャッシュに保存。実行中の同一キーがあればその結果を共有"""
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = concurrent.futures.Future()
+            _INFLIGHT[key] = future
+    
+    if not is_leader:
+        # 先行リクエストの所要時間はAPIタイムアウトで上限があるため、独自の待ち時間は設けない
+        # （短く打ち切ると先行側が代替応答を返せる場合でも後続だけエラーになる）
+        return future.result()
+    
+    try:
+        payload = _json_dumps(compute())
+        _store_cached_response(key, payload)
+        _store_shared_response(key, payload)
+        future.set_result(payload)
+        return payload
+    except BaseException as e:
+        # 待機中の後続リクエストが取り残されないよう、どの例外でも結果を確定させる
+        future.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
+# アクセスログ用タイムスタンプ（秒単位で再利用）
+_LOG_TS_CACHE = [0, ""]
+
+def _log_timestamp() -> str:
+    now = int(time.time())
+    cache = _LOG_TS_CACHE
+    if now != cache[0]:
+        cache[1] = datetime.datetime.fromtimestamp(now).isoformat()
+        cache[0] = now
+    return cache[1]
+
+# Keep-Alive接続のアイドルタイムアウト（秒）
+KEEPALIVE_IDLE_TIMEOUT = 15
+
+# CORSプリフライト結果のブラウザキャッシュ期間（秒）
+CORS_PREFLIGHT_MAX_AGE = '86400'
+
+# 予測日数の上限（応答サイズと計算量を抑える）
+MAX_PREDICTION_DAYS = 60
+
+@functools.lru_cache(maxsize=256)
+def _parse_prediction_query(query: str, default_days: int) -> Tuple[str, int, str, bool, str, Optional[float]]:
+    """予測APIクエリ文字列の解析（同一クエリは結果を再利用, 未対応の通貨ペア・daysが整数でない・範囲外の場合はValueError）"""
+    params = dict(urllib.parse.parse_qsl(query))
+    
+    pair = params.get('pair', 'USD/JPY')
+    if pair not in CURRENCY_PAIRS:
+        raise ValueError(f"unsupported pair: {pair}")
+    days = int(params.get('days', default_days))
+    if not 1 <= days <= MAX_PREDICTION_DAYS:
+        raise ValueError(f"days out of range: {days}")
+    timezone = params.get('timezone', 'UTC')
+    use_business_days = params.get('use_business_days', 'false').lower() == 'true'
+    country = params.get('country', 'JP')
+    
+    # 手動レートパラメータ（数値でなければ無視）
+    manual_rate = None
+    if 'manual_rate' in params:
+        try:
+            manual_rate = float(params['manual_rate'])
+        except ValueError:
+            manual_rate = None
+    
+    return pair, days, timezone, use_business_days, country, manual_rate
+
+# 起動時の機能テスト完了フラグ（/healthz のレディネス判定用）
+_READY = threading.Event()
+
+class FXHTTPServer(http.server.ThreadingHTTPServer):
+    """リクエストごとにスレッドで処理するHTTPサーバー"""
+    daemon_threads = True
+    allow_reuse_address = True
+    # 同時接続の急増時にSYNを取りこぼさないよう待ち行列を拡大（既定は5）
+    request_queue_size = 128
+
 class FXRequestHandler(http.server.BaseHTTPRequestHandler):
     """HTTPリクエストハンドラー（手動レート対応版）"""
     
+    # Keep-Alive（全応答でContent-Lengthを送信）。アイドル接続はtimeout秒で切断
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_IDLE_TIMEOUT
+    
+    # ヘッダーと本文をバッファにまとめ、応答ごとに1回の送信で書き出す
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    
     def __init__(self, predictor, *args, **kwargs):
         self.predictor = predictor
         super().__init__(*args, **kwargs)
     
     def do_GET(self):
         if self.path == '/' or self.path == '/index.html':
+            use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+            etag = _HTML_TEMPLATE_GZIP_ETAG if use_gzip else _HTML_TEMPLATE_ETAG
+            
+            if_none_match = self.headers.get('If-None-Match', '')
+            if etag in if_none_match or if_none_match.strip() == '*':
+                self.send_response(304)
+                self.send_header('Vary', 'Accept-Encoding')
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', HTML_CACHE_CONTROL)
+                self.end_headers()
+                return
+            
             self.send_response(200)
             self.send_header('Content-Type', 'text/html; charset=utf-8')
             self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', HTML_CACHE_CONTROL)
             
-            server = FXWebServer()
-            html = server.get_html_template()
-            self.wfile.write(html.encode('utf-8'))
+            if use_gzip:
+                body = _HTML_TEMPLATE_GZIP
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', _HTML_TEMPLATE_GZIP_LENGTH)
+            else:
+                body = _HTML_TEMPLATE_BYTES
+                self.send_header('Content-Length', _HTML_TEMPLATE_LENGTH)
+            self.end_headers()
+            self.wfile.write(body)
             
+        elif self.path == '/healthz':
+            self._send_health()
         elif self.path.startswith('/api/predict?'):
-            self.handle_single_prediction()
+            self._with_prediction_slot(self.handle_single_prediction)
         elif self.path.startswith('/api/predict_multi?'):
-            self.handle_multi_prediction()
+            self._with_prediction_slot(self.handle_multi_prediction)
         else:
             self.send_error(404, "File not found")
     
+    def do_OPTIONS(self):
+        """CORSプリフライト応答（ブラウザ側で1日キャッシュ）"""
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Max-Age', CORS_PREFLIGHT_MAX_AGE)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def _send_health(self):
+        """ヘルスチェック（予測処理は行わない軽量エンドポイント）"""
+        ready = _READY.is_set()
+        body = b'ok' if ready else b'starting'
+        self.send_response(200 if ready else 503)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _with_prediction_slot(self, handler):
+        """予測処理の同時実行数を制限（バルクヘッド）"""
+        if not _PREDICTION_SLOTS.acquire(timeout=PREDICTION_SLOT_TIMEOUT):
+            self.send_error(503, "Server busy")
+            return
+        try:
+            handler()
+        finally:
+            _PREDICTION_SLOTS.release()
+    
     def handle_single_prediction(self):
+        self._handle_prediction(multi=False)
+    
+    def handle_multi_prediction(self):
+        self._handle_prediction(multi=True)
+    
+    def _handle_prediction(self, multi: bool):
+        """予測API共通処理（単日 / 複数日）"""
+        kind = 'multi' if multi else 'single'
         try:
-            import urllib.parse
-            query = urllib.parse.urlparse(self.path).query
-            params = urllib.parse.parse_qs(query)
-            
-            pair = params.get('pair', ['USD/JPY'])[0]
-            days = int(params.get('days', ['1'])[0])
-            timezone = params.get('timezone', ['UTC'])[0]
-            use_business_days = params.get('use_business_days', ['false'])[0].lower() == 'true'
-            country = params.get('country', ['JP'])[0]
-            
-            # 手動レートパラメータ
-            manual_rate = None
-            if 'manual_rate' in params:
-                try:
-                    manual_rate = float(params['manual_rate'][0])
-                except (ValueError, IndexError):
-                    manual_rate = None
-            
-            prediction = self.predictor.predict_rate(pair, days, use_business_days, timezone, country, manual_rate)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            try:
+                pair, days, timezone, use_business_days, country, manual_rate = self._parse_params(
+                    default_days=10 if multi else 1
+                )
+            except ValueError:
+                self.send_error(400, "Invalid pair or days parameter")
+                return
             
-            response = json.dumps(prediction, ensure_ascii=False)
-            self.wfile.write(response.encode('utf-8'))
+            predict = self.predictor.predict_multi_day if multi else self.predictor.predict_rate
+            key = (kind, pair, days, timezone, use_business_days, country, manual_rate)
+            self._serve_cached_prediction(
+                key, RESPONSE_CACHE_TTL[kind],
+                lambda: predict(pair, days, use_business_days, timezone, country, manual_rate)
+            )
             
         except Exception as e:
-            print(f"❌ API エラー: {e}")
-            self.send_error(500, f"Prediction error: {str(e)}")
+            if multi:
+                logger.error("❌ 複数日予測エラー: %s", e)
+                self.send_error(500, f"Multi-prediction error: {str(e)}")
+            else:
+                logger.error("❌ API エラー: %s", e)
+                self.send_error(500, f"Prediction error: {str(e)}")
     
-    def handle_multi_prediction(self):
+    def _parse_params(self, default_days: int) -> Tuple[str, int, str, bool, str, Optional[float]]:
+        """予測APIのクエリパラメータ解析"""
+        return _parse_prediction_query(urllib.parse.urlsplit(self.path).query, default_days)
+    
+    def _serve_cached_prediction(self, key: tuple, ttl: float, compute) -> None:
+        """予測結果をTTLキャッシュ経由で返す（予測失敗時は期限切れキャッシュで代替）"""
+        entry = _lookup_cached_response(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            self._send_json(entry[1], "HIT")
+            return
+        
+        shared = _lookup_shared_response(key)
+        shared_age = time.time() - shared[0] if shared is not None else None
+        if shared_age is not None and shared_age < ttl:
+            # 生成からの経過時間を引き継ぎ、TTLを延長しない（時計のずれで負にならないよう0以上）
+            _store_cached_response(key, shared[1], max(0.0, shared_age))
+            self._send_json(shared[1], "HIT")
+            return
+        
         try:
-            import urllib.parse
-            query = urllib.parse.urlparse(self.path).query
-            params = urllib.parse.parse_qs(query)
-            
-            pair = params.get('pair', ['USD/JPY'])[0]
-            days = int(params.get('days', ['10'])[0])
-            timezone = params.get('timezone', ['UTC'])[0]
-            use_business_days = params.get('use_business_days', ['false'])[0].lower() == 'true'
-            country = params.get('country', ['JP'])[0]
-            
-            # 手動レートパラメータ
-            manual_rate = None
-            if 'manual_rate' in params:
-                try:
-                    manual_rate = float(params['manual_rate'][0])
-                except (ValueError, IndexError):
-                    manual_rate = None
-            
-            predictions = self.predictor.predict_multi_day(pair, days, use_business_days, timezone, country, manual_rate)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = json.dumps(predictions, ensure_ascii=False)
-            self.wfile.write(response.encode('utf-8'))
-            
+            payload = _compute_single_flight(key, compute)
         except Exception as e:
-            print(f"❌ 複数日予測エラー: {e}")
-            self.send_error(500, f"Multi-prediction error: {str(e)}")
+            stale = entry[1] if entry is not None else (shared[1] if shared is not None else None)
+            if stale is None:
+                raise
+            logger.warning("⚠️ 予測失敗 - 期限切れキャッシュで応答: %s", e)
+            self._send_json(stale, "STALE")
+            return
+        
+        self._send_json(payload, "MISS")
+    
+    def _send_json(self, payload: bytes, cache_status: str) -> None:
+        """JSONレスポンス送信"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Cache', cache_status)
+        self.send_header('Vary', 'Accept-Encoding')
+        
+        if len(payload) > JSON_GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            payload = gzip.compress(payload, compresslevel=1)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        
+        self.wfile.write(payload)
     
     def log_message(self, format, *args):
-        message = f"{datetime.datetime.now().isoformat()} - {format % args}"
-        print(message)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s - %s", _log_timestamp(), format % args)
 
 def create_handler(predictor):
     def handler(*args, **kwargs):
         return FXRequestHandler(predictor, *args, **kwargs)
     return handler
 
+def _run_startup_warmup(predictor, run_selftest: bool = True) -> None:
+    """起動時ウォームアップ（全通貨ペアのレートをキャッシュ）と機能テスト。完了後に /healthz がレディを返す"""
+    try:
+        print("🔥 レートキャッシュのウォームアップ中...")
+        rates = predictor.data_provider.get_all_rates("Tokyo")
+        summary = ", ".join(f"{pair}={data['rate']}" for pair, data in rates.items())
+        print(f"🔥 ウォームアップ完了: {summary}")
+        
+        if run_selftest:
+            print("🧪 手動レート機能テスト実行中...")
+            test_prediction = predictor.predict_rate("USD/JPY", 1, timezone="Tokyo")
+            print(f"🧪 テスト結果: USD/JPY = {test_prediction['predicted_rate']}")
+            print(f"📊 データソース: {test_prediction['current_data_source']}")
+            print(f"✏️ 手動入力必要: {test_prediction.get('manual_input_required', False)}")
+    except Exception as e:
+        print(f"⚠️ ウォームアップ・機能テスト失敗: {e}")
+    finally:
+        _READY.set()
+
+def _configure_logging() -> logging.handlers.QueueListener:
+    """ログ出力をキュー経由で専用スレッドに任せる（リクエスト処理スレッドで標準出力に書かない）"""
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    
+    root_logger = logging.getLogger()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    return listener
+
+# ワーカープロセスの停止猶予（秒）と、異常終了したワーカーを再起動するまでの待機（秒）
+WORKER_SHUTDOWN_GRACE = 30
+WORKER_RESPAWN_DELAY = 1.0
+
+def _supervise_workers(workers: int) -> Optional[int]:
+    """ワーカープロセスを起動して監視（子プロセスではワーカー番号を返し、親プロセスは停止まで戻らずNoneを返す）"""
+    if workers <= 1 or not hasattr(os, 'fork'):
+        return 0
+    
+    parent_handler = signal.getsignal(signal.SIGTERM)
+    children: Dict[int, int] = {}
+    
+    def spawn(index: int) -> bool:
+        pid = os.fork()
+        if pid == 0:
+            # 親の監視用ハンドラーを引き継がない
+            signal.signal(signal.SIGTERM, parent_handler)
+            print(f"👷 ワーカープロセス起動: #{index} pid={os.getpid()}")
+            return True
+        children[pid] = index
+        return False
+    
+    def _handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+    
+    for index in range(workers):
+        if spawn(index):
+            return index
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    print(f"👷 ワーカープロセス数: {workers} (監視プロセス pid={os.getpid()})")
+    
+    try:
+        while True:
+            pid, status = os.wait()
+            index = children.pop(pid, None)
+            if index is None:
+                continue
+            print(f"⚠️ ワーカー #{index} 終了 (pid={pid}, status={status}) - 再起動します")
+            time.sleep(WORKER_RESPAWN_DELAY)
+            if spawn(index):
+                return index
+    except KeyboardInterrupt:
+        print("\n🛑 ワーカープロセス停止中...")
+    
+    _stop_workers(children)
+    return None
+
+def _stop_workers(children: Dict[int, int]) -> None:
+    """全ワーカーにSIGTERMを送り、猶予時間内に終了しないものは強制終了して回収"""
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    
+    # ワーカー側の待機(WORKER_SHUTDOWN_GRACE)が終わるまで余裕を持って待つ
+    deadline = time.monotonic() + WORKER_SHUTDOWN_GRACE + 5
+    while children and time.monotonic() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            time.sleep(0.1)
+            continue
+        children.pop(pid, None)
+    
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+def _install_graceful_shutdown(httpd: http.server.HTTPServer) -> None:
+    """SIGTERMで新規受付を停止（serve_foreverを抜けた後に処理中の予測の完了を待つ）"""
+    def _handle_sigterm(signum, frame):
+        # shutdown()はserve_foreverの完了を待つため、別スレッドから呼び出す
+        threading.Thread(target=httpd.shutdown, name="fx-shutdown", daemon=True).start()
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+def _drain_predictions(timeout: float) -> None:
+    """処理中の予測が完了するまで待つ（全スロットを確保できた時点で完了）"""
+    deadline = time.monotonic() + timeout
+    for _ in range(MAX_CONCURRENT_PREDICTIONS):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not _PREDICTION_SLOTS.acquire(timeout=remaining):
+            logger.warning("⚠️ 処理中の予測を待たずに停止")
+            return
+
 def main():
     """メイン実行関数（手動レート対応版）"""
     try:
@@ -1613,25 +2546,41 @@ def main():
         else:
             print("⚠️ python-dateutil不可 - 基本日付処理モード")
         
-        predictor = FXPredictor()
-        print("✅ Live API + 手動レート統合予測エンジン初期化完了")
-        
-        # 機能テスト
-        print("🧪 手動レート機能テスト実行中...")
-        test_prediction = predictor.predict_rate("USD/JPY", 1, timezone="Tokyo")
-        print(f"🧪 テスト結果: USD/JPY = {test_prediction['predicted_rate']}")
-        print(f"📊 データソース: {test_prediction['current_data_source']}")
-        print(f"✏️ 手動入力必要: {test_prediction.get('manual_input_required', False)}")
-        print("=" * 50)
+        workers = max(1, int(os.environ.get('FX_WORKERS', '1')))
         
-        handler = create_handler(predictor)
-        with socketserver.TCPServer(("", port), handler) as httpd:
+        # ハンドラーは予測エンジン初期化後に設定（ワーカー分岐後に各プロセスで生成するため）
+        with FXHTTPServer(("", port), None) as httpd:
+            # 待受ソケットを共有したままワーカープロセスを分岐（スレッド生成より前に行う）
+            worker_index = _supervise_workers(workers)
+            if worker_index is None:
+                return
+            _install_graceful_shutdown(httpd)
+            log_listener = _configure_logging()
+            
+            predictor = FXPredictor()
+            print("✅ Live API + 手動レート統合予測エンジン初期化完了")
+            
+            # ウォームアップと機能テストはバックグラウンドで実行し、待受開始を遅らせない
+            # （複数ワーカー時は上流APIへの重複アクセスを避けるため先頭ワーカーのみ）
+            if worker_index == 0:
+                run_selftest = os.environ.get('FX_STARTUP_SELFTEST', '1') != '0'
+                threading.Thread(target=_run_startup_warmup, args=(predictor, run_selftest),
+                                 name="fx-warmup", daemon=True).start()
+            else:
+                _READY.set()
+            
+            httpd.RequestHandlerClass = create_handler(predictor)
             print(f"🌐 Live API + 手動レート サーバー起動完了: http://0.0.0.0:{port}")
             print("📡 複数API統合 + ✏️ 利用者レート設定対応")
             print("🔄 リクエスト待機中...")
             print("=" * 50)
             
-            httpd.serve_forever()
+            try:
+                httpd.serve_forever()
+                _drain_predictions(WORKER_SHUTDOWN_GRACE)
+                print("🛑 Manual Rate サーバー停止")
+            finally:
+                log_listener.stop()
             
     except KeyboardInterrupt:
         print("\n🛑 Manual Rate サーバー停止中...")